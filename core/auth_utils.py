@@ -1,4 +1,7 @@
+from functools import lru_cache
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password
 from django.db.utils import OperationalError, ProgrammingError
 
 
@@ -7,9 +10,15 @@ DEFAULT_ADMIN_PASSWORD = 'admin'
 DEFAULT_GUEST_USERNAME = 'guest'
 DEFAULT_GUEST_PASSWORD = 'guest'
 
+_default_users_ready = False
+
 
 def ensure_default_users() -> None:
     """Create default admin/guest users on first run if they do not exist yet."""
+    global _default_users_ready
+    if _default_users_ready:
+        return
+
     user_model = get_user_model()
 
     try:
@@ -39,3 +48,15 @@ def ensure_default_users() -> None:
     except (OperationalError, ProgrammingError):
         # DB might not be migrated yet.
         return
+
+    _default_users_ready = True
+
+
+@lru_cache(maxsize=32)
+def _is_default_admin_password(encoded_password: str) -> bool:
+    return check_password(DEFAULT_ADMIN_PASSWORD, encoded_password)
+
+
+def uses_default_admin_password(user) -> bool:
+    """Check the admin password without rehashing it (no DB write) and only once per hash."""
+    return _is_default_admin_password(user.password)
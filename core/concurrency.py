@@ -0,0 +1,104 @@
+import hashlib
+import os
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: run without coordination.
+    fcntl = None
+
+
+class OperationBusy(Exception):
+    """The client already has the maximum number of heavy operations running."""
+
+
+def _lock_path(kind: str, key) -> Path:
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+    return Path(settings.MEDIA_ROOT) / 'locks' / f'{kind}-{digest}.lock'
+
+
+class _LockFile:
+    """An exclusive ``flock`` on a file that is deleted again on release."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.handle = None
+
+    def acquire(self, blocking: bool) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            handle = self.path.open('a')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                return False
+            except BaseException:
+                handle.close()
+                raise
+
+            # The previous holder deletes the file on release; a lock taken on
+            # a deleted file excludes nobody, so open the current one again.
+            try:
+                current = os.stat(self.path)
+            except FileNotFoundError:
+                current = None
+            locked = os.fstat(handle.fileno())
+            if current is not None and (current.st_dev, current.st_ino) == (locked.st_dev, locked.st_ino):
+                self.handle = handle
+                return True
+            handle.close()
+
+    def release(self) -> None:
+        # Unlink while still locked, so no one can lock this file afterwards.
+        self.path.unlink(missing_ok=True)
+        self.handle.close()
+        self.handle = None
+
+
+class HeavyOperations:
+    """Single-flight execution of heavy pipeline calls with a per-client cap.
+
+    Coordination uses ``flock`` on files in ``MEDIA_ROOT/locks``, so it holds
+    across gunicorn worker processes as well as threads. Locks are released
+    by the kernel if a worker dies; lock files are removed on release.
+
+    Every call, including one that only waits for an identical call, takes
+    one of the client's ``settings.HEAVY_OPERATIONS_PER_USER`` slots first,
+    so repeated clicks beyond the cap are refused instead of tying up
+    workers. A call with a key then holds that key's lock while it runs;
+    identical calls wait for it and then run ``func`` themselves, which must
+    therefore reuse a result file that is already up to date (see
+    ``create_report`` and ``decode_for_admin``). If the first call failed,
+    a waiter computes again, still within its own slot.
+    """
+
+    def run(self, client_id, key: tuple | None, func):
+        if fcntl is None:
+            return func()
+
+        slot = self._slot(client_id)
+        try:
+            if key is None:
+                return func()
+            operation = _LockFile(_lock_path('op', key))
+            operation.acquire(blocking=True)
+            try:
+                return func()
+            finally:
+                operation.release()
+        finally:
+            slot.release()
+
+    def _slot(self, client_id) -> _LockFile:
+        limit = getattr(settings, 'HEAVY_OPERATIONS_PER_USER', 2)
+        for index in range(limit):
+            slot = _LockFile(_lock_path('slot', (client_id, index)))
+            if slot.acquire(blocking=False):
+                return slot
+        raise OperationBusy
+
+
+heavy_operations = HeavyOperations()
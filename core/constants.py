@@ -0,0 +1,19 @@
+"""Options shared by forms and services.
+
+Kept free of pandas/openpyxl imports so that forms and views can use them
+without loading the Excel pipeline.
+"""
+
+DEDUP_REPORT = 'report'
+DEDUP_KEEP_FIRST = 'first'
+DEDUP_KEEP_LAST = 'last'
+DEDUP_STRATEGIES = (DEDUP_REPORT, DEDUP_KEEP_FIRST, DEDUP_KEEP_LAST)
+
+PROGRAM_CADRE = 'Офицеры кадра'
+PROGRAM_RESERVE = 'Офицеры запаса'
+
+REPORT_SECTIONS = {
+    'cadre': ('I. Офицеры кадра', False),
+    'reserve': ('II. Офицеры запаса', False),
+    'others': ('III. Сержанты и солдаты', True),
+}
@@ -0,0 +1,15 @@
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs) -> None:
+    """Apply ``settings.SQLITE_PRAGMAS`` to every new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -1,5 +1,14 @@
 from django import forms
 
+from .constants import (
+    DEDUP_KEEP_FIRST,
+    DEDUP_KEEP_LAST,
+    DEDUP_REPORT,
+    PROGRAM_CADRE,
+    PROGRAM_RESERVE,
+    REPORT_SECTIONS,
+)
+
 
 class MultipleFileInput(forms.ClearableFileInput):
     allow_multiple_selected = True
@@ -7,7 +16,7 @@ class MultipleFileInput(forms.ClearableFileInput):
 
 class MultipleFileField(forms.FileField):
     def __init__(self, *args, **kwargs):
-        kwargs.setdefault('widget', MultipleFileInput(attrs={'accept': '.xlsx,.xls'}))
+        kwargs.setdefault('widget', MultipleFileInput(attrs={'accept': '.xlsx,.xls,.zip'}))
         super().__init__(*args, **kwargs)
 
     def clean(self, data, initial=None):
@@ -19,6 +28,21 @@ class MultipleFileField(forms.FileField):
 
 class ExcelUploadForm(forms.Form):
     files = MultipleFileField(label='Excel файлы')
+    sheets = forms.CharField(
+        label='Листы',
+        required=False,
+        help_text='Шаблон имени листа, например «ВУЗ*». Пусто — все листы книги.',
+    )
+    dedup = forms.ChoiceField(
+        label='Повторяющиеся строки',
+        choices=[
+            (DEDUP_REPORT, 'Оставить и отметить в листе «Замечания»'),
+            (DEDUP_KEEP_FIRST, 'Удалить, оставив первое вхождение'),
+            (DEDUP_KEEP_LAST, 'Удалить, оставив вхождение из последнего файла'),
+        ],
+        initial=DEDUP_REPORT,
+        required=False,
+    )
 
     def clean_files(self):
         files = self.cleaned_data.get('files', [])
@@ -26,7 +50,51 @@ class ExcelUploadForm(forms.Form):
             raise forms.ValidationError('Выберите хотя бы один Excel файл.')
 
         for file in files:
-            if not file.name.lower().endswith(('.xlsx', '.xls')):
-                raise forms.ValidationError(f'Файл {file.name} не является Excel.')
+            if not file.name.lower().endswith(('.xlsx', '.xls', '.zip')):
+                raise forms.ValidationError(f'Файл {file.name} не является Excel или zip-архивом.')
 
         return files
+
+    def clean_dedup(self):
+        return self.cleaned_data.get('dedup') or DEDUP_REPORT
+
+
+class ReportForm(forms.Form):
+    okrug = forms.CharField(label='Округ', required=False)
+    ovu = forms.CharField(label='ОВУ', required=False)
+    program = forms.ChoiceField(
+        label='Программа',
+        choices=[
+            ('', 'Все'),
+            (PROGRAM_CADRE, PROGRAM_CADRE),
+            (PROGRAM_RESERVE, PROGRAM_RESERVE),
+        ],
+        required=False,
+    )
+    date_from = forms.DateField(
+        label='Начало сбора с',
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    date_to = forms.DateField(
+        label='по',
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    sections = forms.MultipleChoiceField(
+        label='Разделы',
+        choices=[(key, title) for key, (title, _) in REPORT_SECTIONS.items()],
+        initial=list(REPORT_SECTIONS),
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_to < date_from:
+            raise forms.ValidationError('Дата «по» не может быть раньше даты «с».')
+        if not cleaned_data.get('sections') and 'sections' not in self.errors:
+            self.add_error('sections', 'Выберите хотя бы один раздел отчёта.')
+        return cleaned_data
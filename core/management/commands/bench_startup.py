@@ -0,0 +1,43 @@
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SETUP = (
+    'import os, django; '
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r}); "
+    'django.setup(); '
+)
+
+SCENARIOS = [
+    ('django.setup()', ''),
+    ('+ URLconf (login, dashboard, manage.py checks)', 'import guk_project.urls; '),
+    ('+ core.services (first pipeline request)', 'import guk_project.urls, core.services; '),
+    ('+ warm_up()', 'import guk_project.urls, core.services; core.services.warm_up(); '),
+]
+
+
+class Command(BaseCommand):
+    help = 'Measure cold-start time of a fresh interpreter for typical worker/command entry points.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh processes per scenario.')
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+        setup = SETUP.format(settings_module=settings.SETTINGS_MODULE)
+
+        self.stdout.write(f'{"scenario":<50} {"median, ms":>10} {"min, ms":>10}')
+        for title, code in SCENARIOS:
+            timings = [self._run(setup + code) for _ in range(runs)]
+            self.stdout.write(
+                f'{title:<50} {statistics.median(timings):>10.0f} {min(timings):>10.0f}'
+            )
+
+    def _run(self, code: str) -> float:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, check=True)
+        return (time.perf_counter() - started) * 1000
@@ -0,0 +1,502 @@
+import copy
+import http.cookiejar
+import io
+import random
+import re
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import Workbook
+
+from core.services import REQUIRED_COLUMNS, _load_decoding_maps, _load_tabular_data
+
+STEPS = ['login', 'upload', 'decode', 'report', 'download']
+
+OUTCOME_OK = 'ok'
+OUTCOME_BUSY = 'busy'
+OUTCOME_ERROR = 'error'
+
+LOADTEST_PASSWORD = 'loadtest'
+OKRUGA = ['МВО', 'ЛенВО', 'ЮВО', 'ЦВО', 'ВВО']
+OVU = ['СВ', 'ВКС', 'ВМФ', 'РВСН', 'ВДВ']
+PROGRAMS = ['Офицеры кадра', 'Офицеры запаса', 'Сержанты запаса', 'Солдаты запаса']
+
+# Header rows exactly as downloadExcel() in questionnaire.html writes them;
+# this is the layout users actually upload.
+QUESTIONNAIRE_HEADER_ROWS = [
+    [
+        'ОКРУГ ВУЗа', 'ОВУ, отв. за подготовку', 'Наименование ВУЗа', 'Аббревиатура',
+        'ВУС', '', 'Должность', '',
+        'Сбор/стажировка', 'Программа подготовки', 'ОКРУГ проведения сборов', 'Место проведения учебного сбора',
+        'Планируется (чел.)', '', 'Срок проведения', '',
+        'ФИО ответственного', 'Должность ответственного', 'Мобильный телефон', 'Городской телефон', 'АТСР',
+    ],
+    [
+        '1', '2', '3', '4',
+        '№', 'Наименование', '№', 'Наименование',
+        '9', '10', '11', '12',
+        'преподавателей', 'студентов', 'начало', 'окончание',
+        '17', '18', '19', '20', '21',
+    ],
+    [str(number) for number in range(1, 22)],
+]
+
+# Record keys in the column order of downloadExcel(). Keys outside
+# REQUIRED_COLUMNS are questionnaire-only columns the pipeline ignores.
+QUESTIONNAIRE_COLUMNS = [
+    'okrug_vuza', 'ovu_otv_podgotovku', 'nazvanie_vuza', 'abbreviatura',
+    'vus_no', 'vus_naimenovanie', 'doljnost_no', 'doljnost_naimenovanie',
+    'sbor_stazhirovka', 'programma_podgotovki', 'okrug_provedeniya', 'mesto_provedeniya_uchebnogo_sbora',
+    'planiruetsya_prepodavatelej', 'planiruetsya_studentov', 'srok_provedeniya_nachalo', 'srok_provedeniya_okonchanie',
+    'fio_otvetstvennogo', 'doljnost_otvetstvennogo', 'mobilnyy', 'gorodskoj_telefon', 'atsr',
+]
+
+DATE_COLUMNS = ('srok_provedeniya_nachalo', 'srok_provedeniya_okonchanie')
+COUNT_COLUMNS = ('planiruetsya_prepodavatelej', 'planiruetsya_studentov')
+
+ALERT_LEVEL_RE = re.compile(r'class="alert alert-(\w+)"')
+
+
+def generate_records(rows: int, rng: random.Random) -> list[dict]:
+    """Random questionnaire entries, as the form would save them."""
+    officer_vus, nonoffice_vus, nonoffice_positions = _load_decoding_maps()
+    officer_codes = list(officer_vus) or ['021500']
+    nonoffice_codes = list(nonoffice_vus) or ['033']
+    position_codes = list(nonoffice_positions) or ['001']
+
+    records = []
+    for _ in range(rows):
+        program = rng.choice(PROGRAMS)
+        is_officer = 'офицер' in program.lower()
+        okrug = rng.choice(OKRUGA)
+        start = datetime(2026, 1, 1) + timedelta(days=rng.randrange(300))
+        records.append({
+            'okrug_vuza': okrug,
+            'ovu_otv_podgotovku': rng.choice(OVU),
+            'nazvanie_vuza': f'ВУЗ № {rng.randrange(1, 200)}',
+            # The form's «Абривеатура» key never matches this column, so it stays empty.
+            'abbreviatura': '',
+            'vus_no': rng.choice(officer_codes if is_officer else nonoffice_codes),
+            'vus_naimenovanie': '',
+            'doljnost_no': '' if is_officer else rng.choice(position_codes),
+            'doljnost_naimenovanie': '',
+            'sbor_stazhirovka': rng.choice(['Сбор', 'Стажировка']),
+            'programma_podgotovki': program,
+            'okrug_provedeniya': okrug,
+            'mesto_provedeniya_uchebnogo_sbora': f'в/ч {rng.randrange(10000, 99999)}, Г. Курск',
+            'planiruetsya_prepodavatelej': rng.randrange(1, 20),
+            'planiruetsya_studentov': rng.randrange(5, 300),
+            'srok_provedeniya_nachalo': start,
+            'srok_provedeniya_okonchanie': start + timedelta(days=30),
+            'fio_otvetstvennogo': 'Иванов Иван Иванович',
+            'doljnost_otvetstvennogo': 'Начальник кафедры',
+            'mobilnyy': '+7 (900) 000-00-00',
+            'gorodskoj_telefon': '',
+            'atsr': '',
+        })
+    return records
+
+
+def build_workbook(records: list[dict]) -> bytes:
+    """Write records in the questionnaire layout."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Лист1')
+    for header_row in QUESTIONNAIRE_HEADER_ROWS:
+        ws.append(header_row)
+    for record in records:
+        ws.append([record[column] for column in QUESTIONNAIRE_COLUMNS])
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def check_workbook(content: bytes, records: list[dict]) -> None:
+    """Fail early, naming the columns, if the upload parser misreads a workbook."""
+    parsed = _load_tabular_data(io.BytesIO(content))
+    expected = pd.DataFrame(records)
+    if len(parsed) != len(expected):
+        raise CommandError(
+            f'Questionnaire workbook is misparsed: {len(parsed)} rows read instead of {len(expected)}.'
+        )
+
+    problems = []
+    for column in REQUIRED_COLUMNS:
+        got, want = parsed[column], expected[column]
+        if column in DATE_COLUMNS:
+            same = pd.to_datetime(got, errors='coerce') == want
+        elif column in COUNT_COLUMNS:
+            same = pd.to_numeric(got, errors='coerce') == want
+        else:
+            same = got.str.strip() == want
+        if not same.all():
+            row = (~same).idxmax()
+            problems.append(f'{column} (row {row + 1}: expected {want[row]!r}, read {got[row]!r})')
+    if problems:
+        raise CommandError(f'Questionnaire workbook is misparsed: {"; ".join(problems)}.')
+
+
+def dashboard_outcome(session) -> str:
+    """Classify a redirect back to the dashboard by the flash message it left."""
+    levels = ALERT_LEVEL_RE.findall(session.text('/'))
+    if 'success' in levels:
+        return OUTCOME_OK
+    if 'warning' in levels:
+        return OUTCOME_BUSY
+    return OUTCOME_ERROR
+
+
+def percentile(values: list[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """Minimal browser stand-in for a running server: cookies, CSRF, no redirects."""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies),
+            _NoRedirect(),
+        )
+
+    def fork(self) -> 'HttpSession':
+        """A copy with its own cookie jar, for a request running in parallel."""
+        session = HttpSession(self.base_url, self.timeout)
+        session.adopt(self)
+        return session
+
+    def adopt(self, other: 'HttpSession') -> None:
+        self.cookies.clear()
+        for cookie in other.cookies:
+            self.cookies.set_cookie(copy.copy(cookie))
+
+    def _csrf_token(self) -> str:
+        for cookie in self.cookies:
+            if cookie.name == settings.CSRF_COOKIE_NAME:
+                return cookie.value
+        return ''
+
+    def _open(self, method: str, path: str, data: bytes | None = None, headers=None) -> tuple[int, bytes]:
+        url = f'{self.base_url}{path}'
+        headers = {'Referer': url, 'X-CSRFToken': self._csrf_token(), **(headers or {})}
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read()
+
+    def request(self, method: str, path: str, data: bytes | None = None, headers=None) -> int:
+        return self._open(method, path, data, headers)[0]
+
+    def get(self, path: str, params=None) -> int:
+        query = f'?{urllib.parse.urlencode(params, doseq=True)}' if params else ''
+        return self.request('GET', f'{path}{query}')
+
+    def text(self, path: str) -> str:
+        return self._open('GET', path)[1].decode('utf-8', errors='replace')
+
+    def login(self, username: str, password: str) -> int:
+        self.get('/login/')
+        body = urllib.parse.urlencode({
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': self._csrf_token(),
+        }).encode()
+        return self.request('POST', '/login/', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+
+    def upload(self, files: list[tuple[str, bytes]]) -> int:
+        boundary = uuid.uuid4().hex
+        parts = [
+            f'--{boundary}\r\nContent-Disposition: form-data; name="csrfmiddlewaretoken"\r\n\r\n'
+            f'{self._csrf_token()}\r\n'.encode()
+        ]
+        for name, content in files:
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="files"; filename="{name}"\r\n'
+                'Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n'.encode()
+            )
+            parts.append(content + b'\r\n')
+        parts.append(f'--{boundary}--\r\n'.encode())
+        return self.request(
+            'POST', '/upload/', b''.join(parts), {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        )
+
+
+class ClientSession:
+    """Same interface on top of the Django test client (in-process app)."""
+
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client()
+
+    def fork(self) -> 'ClientSession':
+        """A copy with its own client; django.test.Client is not thread-safe."""
+        session = ClientSession()
+        session.adopt(self)
+        return session
+
+    def adopt(self, other: 'ClientSession') -> None:
+        self.client.cookies = copy.deepcopy(other.client.cookies)
+
+    @staticmethod
+    def _status(response) -> int:
+        if getattr(response, 'streaming', False):
+            for _ in response.streaming_content:
+                pass
+        return response.status_code
+
+    def get(self, path: str, params=None) -> int:
+        return self._status(self.client.get(path, params or {}))
+
+    def text(self, path: str) -> str:
+        return self.client.get(path).content.decode('utf-8', errors='replace')
+
+    def login(self, username: str, password: str) -> int:
+        return self._status(self.client.post('/login/', {'username': username, 'password': password}))
+
+    def upload(self, files: list[tuple[str, bytes]]) -> int:
+        uploads = []
+        for name, content in files:
+            upload = io.BytesIO(content)
+            upload.name = name
+            uploads.append(upload)
+        return self._status(self.client.post('/upload/', {'files': uploads}))
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test: virtual users log in, upload generated workbooks, run decode and report '
+        'at the same time, then download the result. Runs in-process on a throwaway test '
+        'database by default, or against a running server with --url.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=30, help='Concurrent virtual users.')
+        parser.add_argument('--files', type=int, default=20, help='Workbooks per upload.')
+        parser.add_argument('--rows', type=int, default=50, help='Rows per generated workbook.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running runserver/gunicorn, e.g. http://127.0.0.1:8000. '
+                 'Requires --username/--password of an existing staff account shared by all users '
+                 '(each virtual user has its own session, so the per-session cap still applies).',
+        )
+        parser.add_argument('--username')
+        parser.add_argument('--password')
+        parser.add_argument('--timeout', type=float, default=300.0, help='HTTP timeout, seconds.')
+        parser.add_argument(
+            '--pid',
+            type=int,
+            action='append',
+            default=[],
+            help='Server process to report peak RSS for (its child workers are included). Linux only.',
+        )
+
+    def handle(self, *args, **options):
+        if options['url'] and not (options['username'] and options['password']):
+            raise CommandError('--url requires --username and --password.')
+
+        rng = random.Random(options['seed'])
+        self.stdout.write(f'Generating {options["files"]} workbooks x {options["rows"]} rows...')
+        records = [generate_records(options['rows'], rng) for _ in range(options['files'])]
+        workbooks = [(f'plan_{idx + 1}.xlsx', build_workbook(rows)) for idx, rows in enumerate(records)]
+        check_workbook(workbooks[0][1], records[0])
+
+        if options['url']:
+            results, wall = self._run_users(
+                options['users'],
+                workbooks,
+                lambda: HttpSession(options['url'], options['timeout']),
+                lambda idx: (options['username'], options['password']),
+            )
+        else:
+            results, wall = self._run_in_process(options['users'], workbooks)
+
+        self._report(results, wall, options['pid'])
+
+    def _run_in_process(self, users: int, workbooks):
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+        with tempfile.TemporaryDirectory(prefix='guk_loadtest_') as tmp_dir:
+            # A file-backed test DB: in-memory SQLite does not cope with many threads.
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = str(Path(tmp_dir) / 'db.sqlite3')
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                user_model = get_user_model()
+                for idx in range(users):
+                    user_model.objects.create_user(
+                        f'loadtest{idx}', password=LOADTEST_PASSWORD, is_staff=True
+                    )
+                with override_settings(MEDIA_ROOT=Path(tmp_dir) / 'media'):
+                    return self._run_users(
+                        users,
+                        workbooks,
+                        ClientSession,
+                        lambda idx: (f'loadtest{idx}', LOADTEST_PASSWORD),
+                    )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+    def _run_users(self, users: int, workbooks, session_factory, credentials):
+        from django.db import connections
+
+        results: dict[str, list[tuple[float, str]]] = defaultdict(list)
+        lock = threading.Lock()
+
+        def timed(step: str, call):
+            started = time.perf_counter()
+            try:
+                outcome = call()
+            except Exception:
+                outcome = OUTCOME_ERROR
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                results[step].append((elapsed, outcome))
+
+        def timed_in_thread(step: str, call):
+            try:
+                timed(step, call)
+            finally:
+                connections.close_all()
+
+        def expect(status: int, expected: int) -> str:
+            return OUTCOME_OK if status == expected else OUTCOME_ERROR
+
+        def redirected_with_message(status: int, session) -> str:
+            # Upload and decode always redirect to the dashboard; only the
+            # flash message tells success from failure or a busy refusal.
+            return dashboard_outcome(session) if status == 302 else OUTCOME_ERROR
+
+        def decode(session) -> str:
+            return redirected_with_message(session.get('/decode/'), session)
+
+        def report(session) -> str:
+            status = session.get('/report/')
+            return OUTCOME_OK if status == 200 else redirected_with_message(status, session)
+
+        def virtual_user(idx: int):
+            try:
+                session = session_factory()
+                timed('login', lambda: expect(session.login(*credentials(idx)), 302))
+                timed('upload', lambda: redirected_with_message(session.upload(workbooks), session))
+
+                # Like two browser tabs: each request gets its own copy of the
+                # cookies; decode updates the session, so its copy is kept.
+                decode_session, report_session = session.fork(), session.fork()
+                parallel = [
+                    threading.Thread(target=timed_in_thread, args=('decode', lambda: decode(decode_session))),
+                    threading.Thread(target=timed_in_thread, args=('report', lambda: report(report_session))),
+                ]
+                for thread in parallel:
+                    thread.start()
+                for thread in parallel:
+                    thread.join()
+                session.adopt(decode_session)
+
+                timed('download', lambda: expect(session.get('/download/merged/'), 200))
+            finally:
+                connections.close_all()
+
+        self.stdout.write(f'Running {users} virtual users...')
+        threads = [threading.Thread(target=virtual_user, args=(idx,)) for idx in range(users)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, time.perf_counter() - started
+
+    def _report(self, results, wall: float, pids: list[int]):
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"step":<10} {"count":>6} {"errors":>6} {"busy":>6} {"p50, ms":>10} {"p95, ms":>10} {"p99, ms":>10}'
+        )
+        total = errors = busy = 0
+        for step in STEPS:
+            samples = results.get(step, [])
+            # Latency percentiles cover completed requests only; busy refusals return at once.
+            latencies = sorted(elapsed for elapsed, outcome in samples if outcome != OUTCOME_BUSY)
+            step_errors = sum(1 for _, outcome in samples if outcome == OUTCOME_ERROR)
+            step_busy = sum(1 for _, outcome in samples if outcome == OUTCOME_BUSY)
+            total += len(samples)
+            errors += step_errors
+            busy += step_busy
+            self.stdout.write(
+                f'{step:<10} {len(samples):>6} {step_errors:>6} {step_busy:>6} {percentile(latencies, 50):>10.0f} '
+                f'{percentile(latencies, 95):>10.0f} {percentile(latencies, 99):>10.0f}'
+            )
+
+        self.stdout.write('')
+        self.stdout.write(f'Wall time:   {wall:.1f} s')
+        self.stdout.write(f'Throughput:  {total / wall if wall else 0:.2f} req/s')
+        self.stdout.write(f'Error rate:  {errors / total * 100 if total else 0:.1f}% ({errors}/{total})')
+        self.stdout.write(f'Busy rate:   {busy / total * 100 if total else 0:.1f}% ({busy}/{total})')
+
+        if pids:
+            for pid in pids:
+                for worker_pid in [pid, *self._child_pids(pid)]:
+                    peak = self._peak_rss_kb(worker_pid)
+                    label = f'{peak / 1024:.0f} MB' if peak is not None else 'n/a'
+                    self.stdout.write(f'Peak RSS pid {worker_pid}: {label}')
+        else:
+            peak = self._own_peak_rss_kb()
+            if peak is not None:
+                self.stdout.write(f'Peak RSS (this process): {peak / 1024:.0f} MB')
+
+    @staticmethod
+    def _peak_rss_kb(pid: int) -> int | None:
+        try:
+            status = Path(f'/proc/{pid}/status').read_text()
+        except OSError:
+            return None
+        match = re.search(r'^VmHWM:\s+(\d+) kB', status, re.MULTILINE)
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _child_pids(pid: int) -> list[int]:
+        children = []
+        for stat_path in Path('/proc').glob('[0-9]*/stat'):
+            try:
+                fields = stat_path.read_text().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            if int(fields[1]) == pid:
+                children.append(int(stat_path.parent.name))
+        return children
+
+    @staticmethod
+    def _own_peak_rss_kb() -> int | None:
+        try:
+            import resource
+        except ImportError:
+            return None
+        # ru_maxrss is reported in kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -2,7 +2,7 @@ from django.conf import settings
 from django.shortcuts import redirect
 from django.urls import reverse
 
-from .auth_utils import DEFAULT_ADMIN_PASSWORD, DEFAULT_ADMIN_USERNAME, ensure_default_users
+from .auth_utils import DEFAULT_ADMIN_USERNAME, ensure_default_users, uses_default_admin_password
 
 
 class ForceAdminPasswordChangeMiddleware:
@@ -15,7 +15,7 @@ class ForceAdminPasswordChangeMiddleware:
         ensure_default_users()
 
         if request.user.is_authenticated and request.user.username == DEFAULT_ADMIN_USERNAME:
-            using_default_password = request.user.check_password(DEFAULT_ADMIN_PASSWORD)
+            using_default_password = uses_default_admin_password(request.user)
             if using_default_password:
                 change_url = reverse('password_change')
                 allowed_paths = {
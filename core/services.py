@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+from fnmatch import fnmatch
+import hashlib
+import io
 import json
+import os
 from functools import lru_cache
 from pathlib import Path
 import uuid
+import zipfile
 
 import pandas as pd
 from django.conf import settings
@@ -11,6 +16,15 @@ from openpyxl import Workbook
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.utils import get_column_letter
 
+from .constants import (
+    DEDUP_KEEP_FIRST,
+    DEDUP_REPORT,
+    DEDUP_STRATEGIES,
+    PROGRAM_CADRE,
+    PROGRAM_RESERVE,
+    REPORT_SECTIONS,
+)
+
 MAPPING_DIR = Path(settings.BASE_DIR) / 'Mapping'
 OFFICER_VUS_PATH = MAPPING_DIR / 'officer_vus.json'
 NONOFFICE_VUS_PATH = MAPPING_DIR / 'nonoffice_vus.json'
@@ -82,8 +96,54 @@ HEADER_ALIASES = {
 }
 
 
+SOURCE_COLUMNS = ['istochnik_fajl', 'istochnik_list']
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+ZIP_EXTENSIONS = ('.zip',)
+
+ISSUES_SHEET_TITLE = 'Замечания'
+ISSUE_COLUMNS = ['row', 'nazvanie_vuza', 'vus_no', 'issues', *SOURCE_COLUMNS]
+ISSUE_HEADERS = ['Строка', 'Наименование ВУЗа', 'ВУС №', 'Замечания', 'Файл', 'Лист']
+# Data in the merged workbook starts after three header rows.
+ISSUE_ROW_OFFSET = 4
+
+REQUIRED_FIELD_LABELS = {
+    'okrug_vuza': 'ОКРУГ ВУЗа',
+    'ovu_otv_podgotovku': 'ОВУ, отв. за подготовку',
+    'nazvanie_vuza': 'Наименование ВУЗа',
+    'sbor_stazhirovka': 'Сбор/стажировка',
+    'programma_podgotovki': 'Программа подготовки',
+    'mesto_provedeniya_uchebnogo_sbora': 'Место проведения',
+    'planiruetsya_prepodavatelej': 'Преподавателей',
+    'planiruetsya_studentov': 'Студентов',
+    'srok_provedeniya_nachalo': 'Начало',
+    'srok_provedeniya_okonchanie': 'Окончание',
+    'fio_otvetstvennogo': 'ФИО ответственного',
+    'mobilnyy': 'Мобильный',
+}
+
+COUNT_LIMITS = {
+    'planiruetsya_prepodavatelej': ('Преподавателей', 100),
+    'planiruetsya_studentov': ('Студентов', 1000),
+}
+
+MIN_DURATION_DAYS = [
+    ('сбор', 15),
+    ('стажировка', 30),
+]
+
+CODE_COLUMNS = ('vus_no', 'doljnost_no')
+# Sergeant/soldier and officer VUS codes.
+VUS_CODE_WIDTHS = (3, 6)
+POSITION_CODE_WIDTHS = (3,)
+
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_READ_BLOCK = 64 * 1024
+
+
 def _normalize(value: str) -> str:
-    return ''.join(ch for ch in str(value).lower() if ch.isalnum() or ch.isspace()).strip()
+    # Punctuation separates words: «Сбор/стажировка» -> «сбор стажировка».
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in str(value).lower()).split())
 
 
 def _normalize_code(value) -> str:
@@ -113,7 +173,7 @@ def _code_candidates(value, width: int) -> list[str]:
     return candidates
 
 
-@lru_cache(maxsize=1)
+@lru_cache(maxsize=None)
 def _load_json_mapping(path: str) -> dict[str, str]:
     file_path = Path(path)
     if not file_path.exists():
@@ -144,6 +204,11 @@ def _load_decoding_maps() -> tuple[dict[str, str], dict[str, str], dict[str, str
     )
 
 
+def warm_up() -> None:
+    """Preload pandas/openpyxl (via this module) and the Mapping/ dictionaries."""
+    _load_decoding_maps()
+
+
 def _lookup_decoding(value, mapping: dict[str, str], width: int) -> str | None:
     for candidate in _code_candidates(value, width):
         if candidate in mapping:
@@ -151,24 +216,74 @@ def _lookup_decoding(value, mapping: dict[str, str], width: int) -> str | None:
     return None
 
 
-def _vus_code_length(value) -> int:
+def _canonical_code(value, widths: tuple[int, ...]) -> str:
+    # Excel stores codes as numbers and drops leading zeros (021500 -> 21500);
+    # pad a purely numeric code to the shortest width it fits.
     text = _normalize_code(value)
+    if text.isdigit():
+        for width in sorted(widths):
+            if len(text) <= width:
+                return text.zfill(width)
+    return text
+
+
+def _vus_code_length(value) -> int:
+    text = _canonical_code(value, VUS_CODE_WIDTHS)
     digits = ''.join(ch for ch in text if ch.isdigit())
     return len(digits)
 
 
+def _normalize_code_series(series: pd.Series) -> pd.Series:
+    text = series.fillna('').astype(str).str.strip()
+    return text.str.replace(r'^(\d+)\.0$', r'\1', regex=True)
+
+
+def _canonical_code_series(series: pd.Series, widths: tuple[int, ...]) -> pd.Series:
+    """Vectorized ``_canonical_code``."""
+    text = _normalize_code_series(series)
+    numeric = text.str.fullmatch(r'\d+')
+    lengths = text.str.len()
+    out = text
+    for width in sorted(widths, reverse=True):
+        out = out.mask(numeric & (lengths <= width), text.str.zfill(width))
+    return out
+
+
+def _to_dates(series: pd.Series) -> pd.Series:
+    return pd.to_datetime(series, errors='coerce')
+
+
+def _to_counts(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series, errors='coerce')
+
+
+def _row_fingerprints(df: pd.DataFrame) -> pd.Series:
+    normalized = pd.DataFrame(
+        {
+            column: (
+                _normalize_code_series(df[column])
+                if column in CODE_COLUMNS
+                else df[column].fillna('').astype(str).str.strip()
+            )
+            for column in REQUIRED_COLUMNS
+        },
+        index=df.index,
+    )
+    return pd.util.hash_pandas_object(normalized, index=False)
+
+
 def _harmonize_columns(df: pd.DataFrame) -> pd.DataFrame:
     direct_map = {_normalize(column): column for column in REQUIRED_COLUMNS}
     mapped_columns: dict[str, int] = {}
 
     for col_idx, col in enumerate(df.columns):
         normalized = _normalize(col)
-        target = None
-        if normalized in direct_map:
-            target = direct_map[normalized]
-        else:
+        target = direct_map.get(normalized) or HEADER_ALIASES.get(normalized)
+        if target is None:
+            # Combined multi-row headers ("Сроки проведения начало") match an
+            # alias as a substring; skip aliases whose column is already taken.
             for alias, alias_target in HEADER_ALIASES.items():
-                if alias in normalized:
+                if alias in normalized and alias_target not in mapped_columns:
                     target = alias_target
                     break
 
@@ -186,33 +301,50 @@ def _harmonize_columns(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def _detect_header_depth(raw_df: pd.DataFrame) -> int:
+    # The header ends with the column-numbering row. Sub-header rows may also
+    # number some columns (the questionnaire puts 1-4 under single columns),
+    # so a row made only of numbers wins over a partly numbered one.
+    partly_numbered = None
     for idx in range(min(6, len(raw_df))):
         row = raw_df.iloc[idx].astype(str).str.strip()
-        numeric_values = [value for value in row if value.isdigit()]
+        values = [value for value in row if value]
+        numeric_values = [value for value in values if value.isdigit()]
         if len(numeric_values) >= 5 and '1' in numeric_values:
-            return idx + 1
-    return 1
+            if len(numeric_values) == len(values):
+                return idx + 1
+            if partly_numbered is None:
+                partly_numbered = idx + 1
+    return partly_numbered or 1
 
 
 def _load_tabular_data(file) -> pd.DataFrame:
     if hasattr(file, 'seek'):
         file.seek(0)
 
-    raw_df = pd.read_excel(file, header=None, dtype=str).fillna('')
+    with pd.ExcelFile(file) as workbook:
+        return _load_sheet(workbook, workbook.sheet_names[0])
+
+
+def _load_sheet(workbook: pd.ExcelFile, sheet_name) -> pd.DataFrame:
+    raw_df = workbook.parse(sheet_name, header=None, dtype=str).fillna('')
     header_depth = _detect_header_depth(raw_df)
 
     if header_depth <= 1:
-        if hasattr(file, 'seek'):
-            file.seek(0)
-        single_header_df = pd.read_excel(file, dtype=str).fillna('')
+        single_header_df = workbook.parse(sheet_name, dtype=str).fillna('')
         return _harmonize_columns(single_header_df)
 
     header_rows = raw_df.iloc[:header_depth]
     filled_headers = []
+    # Columns where some upper header row starts a new caption; a merged
+    # sub-header is not carried across such a boundary.
+    boundaries = pd.Series(False, index=raw_df.columns)
     for idx, row in header_rows.iterrows():
         row_values = row.astype(str).str.strip()
         if idx < header_depth - 1:
-            row_values = row_values.replace('', pd.NA).ffill().fillna('')
+            blank = row_values == ''
+            groups = (~blank | boundaries).cumsum()
+            row_values = row_values.replace('', pd.NA).groupby(groups).ffill().fillna('')
+            boundaries = boundaries | ~blank
         filled_headers.append(row_values)
 
     combined_headers = []
@@ -220,7 +352,8 @@ def _load_tabular_data(file) -> pd.DataFrame:
         pieces = []
         for row_idx in range(header_depth - 1):
             value = str(filled_headers[row_idx].iloc[col_idx]).strip()
-            if value and value not in pieces:
+            # Column numbers in a sub-header row are not part of the caption.
+            if value and not value.isdigit() and value not in pieces:
                 pieces.append(value)
         combined_headers.append(' '.join(pieces).strip())
 
@@ -229,7 +362,18 @@ def _load_tabular_data(file) -> pd.DataFrame:
     return _harmonize_columns(body_df)
 
 
-def _export_merged_table(df: pd.DataFrame, path: Path) -> None:
+def _write_issues_sheet(wb: Workbook, issues: pd.DataFrame) -> None:
+    ws = wb.create_sheet(title=ISSUES_SHEET_TITLE)
+    ws.append(ISSUE_HEADERS)
+    for cell in ws[1]:
+        cell.font = Font(bold=True)
+    for record in issues[ISSUE_COLUMNS].itertuples(index=False):
+        ws.append(list(record))
+    ws.column_dimensions['B'].width = 50
+    ws.column_dimensions['D'].width = 100
+
+
+def _export_merged_table(df: pd.DataFrame, path: Path, issues: pd.DataFrame | None = None) -> None:
     wb = Workbook()
     ws = wb.active
     ws.title = 'Объединение'
@@ -255,23 +399,265 @@ def _export_merged_table(df: pd.DataFrame, path: Path) -> None:
         for col_idx, (_, _, _, column_name) in enumerate(OUTPUT_COLUMNS, start=1):
             ws.cell(row=row_idx, column=col_idx, value=row[column_name])
 
+    if issues is not None and not issues.empty:
+        _write_issues_sheet(wb, issues)
+
     wb.save(path)
+    dataset_columns = REQUIRED_COLUMNS + [column for column in SOURCE_COLUMNS if column in df.columns]
+    df[dataset_columns].to_csv(_dataset_path(path), index=False)
+
+
+def _dataset_path(path: Path) -> Path:
+    # Harmonized copy of the workbook table, written alongside every export
+    # so that machine-readable downloads do not have to parse the xlsx again.
+    return path.with_suffix('.csv')
+
+
+def _is_up_to_date(target: Path, path: Path) -> bool:
+    # True when a file derived from the merged table at ``path`` is at least
+    # as new as its source, so it can be returned instead of rebuilt.
+    dataset = _dataset_path(path)
+    source = dataset if dataset.exists() else path
+    return target.exists() and target.stat().st_mtime >= source.stat().st_mtime
+
+
+def _iter_dataset_chunks(path: Path, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    dataset = _dataset_path(path)
+    if dataset.exists():
+        with pd.read_csv(dataset, dtype=str, keep_default_na=False, chunksize=chunk_rows) as reader:
+            yield from reader
+        return
+
+    df = _read_harmonized_dataframe(path)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _load_dataset(path: Path) -> pd.DataFrame:
+    dataset = _dataset_path(path)
+    if dataset.exists():
+        return pd.read_csv(dataset, dtype=str, keep_default_na=False)
+    return _read_harmonized_dataframe(path)
+
+
+def iter_merged_csv(path: Path):
+    dataset = _dataset_path(path)
+    if dataset.exists():
+        with dataset.open('rb') as file_obj:
+            while block := file_obj.read(EXPORT_READ_BLOCK):
+                yield block
+        return
+
+    for idx, chunk in enumerate(_iter_dataset_chunks(path)):
+        yield chunk.to_csv(index=False, header=idx == 0).encode('utf-8')
+
+
+def iter_merged_ndjson(path: Path):
+    for chunk in _iter_dataset_chunks(path):
+        yield chunk.to_json(orient='records', lines=True, force_ascii=False).encode('utf-8')
+
+
+def export_merged_parquet(path: Path) -> Path:
+    """Build (once) and return a Parquet copy of the merged table.
+
+    Requires pyarrow or fastparquet; ImportError is propagated to the caller.
+    """
+    parquet_path = path.with_suffix('.parquet')
+    if _is_up_to_date(parquet_path, path):
+        return parquet_path
+
+    frames = list(_iter_dataset_chunks(path))
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=REQUIRED_COLUMNS)
+    # Written aside and renamed, so a concurrent request never reads a
+    # partially written file that already looks up to date.
+    tmp_path = parquet_path.with_name(f'{parquet_path.stem}.{uuid.uuid4().hex}.tmp')
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return parquet_path
 
 
 def _read_harmonized_dataframe(path_or_file) -> pd.DataFrame:
     return _load_tabular_data(path_or_file)
 
 
+def _iter_workbook_sheets(file, source_name: str, sheet_pattern: str = ''):
+    """Yield every (matching) sheet of one workbook, opened once, tagged with its source."""
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    with pd.ExcelFile(file) as workbook:
+        for sheet_name in workbook.sheet_names:
+            if sheet_name == ISSUES_SHEET_TITLE:
+                continue
+            if sheet_pattern and not fnmatch(str(sheet_name).lower(), sheet_pattern.lower()):
+                continue
+
+            df = _load_sheet(workbook, sheet_name)
+            df['istochnik_fajl'] = source_name
+            df['istochnik_list'] = str(sheet_name)
+            yield df
+
+
+def _iter_uploaded_tables(file, sheet_pattern: str = ''):
+    """Yield harmonized sheets of an uploaded workbook or of each workbook in a zip archive.
+
+    Archive entries are decompressed one at a time, so only a single
+    workbook is held in memory. Declared entry sizes are checked against
+    ``settings.UPLOAD_ZIP_MAX_ENTRY_SIZE``/``UPLOAD_ZIP_MAX_TOTAL_SIZE``
+    before anything is inflated.
+    """
+    source_name = Path(str(getattr(file, 'name', '') or '')).name
+    if not source_name.lower().endswith(ZIP_EXTENSIONS):
+        yield from _iter_workbook_sheets(file, source_name, sheet_pattern)
+        return
+
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    max_entry_size = settings.UPLOAD_ZIP_MAX_ENTRY_SIZE
+
+    with zipfile.ZipFile(file) as archive:
+        entries = []
+        for entry in archive.infolist():
+            entry_path = Path(entry.filename)
+            if entry.is_dir() or entry_path.name.startswith('.') or '__MACOSX' in entry_path.parts:
+                continue
+            if not entry_path.name.lower().endswith(EXCEL_EXTENSIONS):
+                continue
+            if entry.file_size > max_entry_size:
+                raise ValueError(f'Файл {entry.filename} в архиве {source_name} слишком большой.')
+            entries.append(entry)
+
+        if sum(entry.file_size for entry in entries) > settings.UPLOAD_ZIP_MAX_TOTAL_SIZE:
+            raise ValueError(f'Архив {source_name} слишком большой после распаковки.')
+
+        for entry in entries:
+            with archive.open(entry) as entry_file:
+                # Never trust the header alone: stop reading past the limit.
+                data = entry_file.read(max_entry_size + 1)
+            if len(data) > max_entry_size:
+                raise ValueError(f'Файл {entry.filename} в архиве {source_name} слишком большой.')
+            content = io.BytesIO(data)
+            yield from _iter_workbook_sheets(content, f'{source_name}/{entry.filename}', sheet_pattern)
+
+
 def _remove_empty_rows(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
 
     cleaned = df.copy().fillna('')
-    mask = cleaned.apply(lambda row: any(str(value).strip() for value in row), axis=1)
+    mask = pd.Series(False, index=cleaned.index)
+    for column in cleaned.columns:
+        if column in SOURCE_COLUMNS:
+            continue
+        mask |= cleaned[column].astype(str).str.strip() != ''
     return cleaned.loc[mask].reset_index(drop=True)
 
 
-def merge_excel_files(files) -> Path:
+def _drop_duplicate_rows(df: pd.DataFrame, strategy: str) -> pd.DataFrame:
+    if strategy not in DEDUP_STRATEGIES:
+        raise ValueError(f'Неизвестный режим удаления дубликатов: {strategy}.')
+    if strategy == DEDUP_REPORT or df.empty:
+        return df
+
+    keep = 'first' if strategy == DEDUP_KEEP_FIRST else 'last'
+    duplicated = _row_fingerprints(df).duplicated(keep=keep)
+    return df.loc[~duplicated.to_numpy()].reset_index(drop=True)
+
+
+def validate_merged_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Run the questionnaire rules over the whole merged table at once.
+
+    Every rule is a boolean mask over all rows; the masks are combined into
+    one row per problematic record with its Excel row number and messages.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+
+    officer_vus, nonoffice_vus, nonoffice_positions = _load_decoding_maps()
+    text = {column: df[column].fillna('').astype(str).str.strip() for column in REQUIRED_COLUMNS}
+
+    # Same zero-padding as decode_for_admin, so 21500 is the officer code 021500.
+    vus = _canonical_code_series(df['vus_no'], VUS_CODE_WIDTHS)
+    position = _canonical_code_series(df['doljnost_no'], POSITION_CODE_WIDTHS)
+    vus_digits = vus.str.replace(r'\D', '', regex=True)
+    position_digits = position.str.replace(r'\D', '', regex=True)
+    is_officer = text['programma_podgotovki'].str.lower().str.contains('офицер', regex=False)
+    is_officer_code = vus_digits.str.len() == 6
+    is_nonofficer_code = vus_digits.str.len() == 3
+
+    checks: dict[str, pd.Series] = {}
+    for column, label in REQUIRED_FIELD_LABELS.items():
+        checks[f'Не заполнено «{label}»'] = text[column] == ''
+
+    checks['Для офицеров «ВУС-№» должен содержать 6 цифр'] = is_officer & ~vus.str.fullmatch(r'\d{6}')
+    checks['Для не офицеров «ВУС-№» должен содержать 3 цифры'] = (
+        ~is_officer & ~vus.str.fullmatch(r'\d{3}')
+    )
+    checks['Для офицеров «Должность-№» должна быть пустой'] = is_officer & (position != '')
+    checks['Для не офицеров «Должность-№» должна содержать 3 цифры'] = (
+        ~is_officer & ~position.str.fullmatch(r'\d{3}')
+    )
+    checks['Код ВУС отсутствует в справочнике офицеров'] = is_officer_code & ~(
+        vus_digits.isin(officer_vus.keys())
+    )
+    checks['Код ВУС отсутствует в справочнике сержантов и солдат'] = is_nonofficer_code & ~(
+        vus_digits.isin(nonoffice_vus.keys())
+    )
+    checks['Код должности отсутствует в справочнике'] = (
+        is_nonofficer_code
+        & (position_digits.str.len() == 3)
+        & ~position_digits.isin(nonoffice_positions.keys())
+    )
+
+    starts = _to_dates(df['srok_provedeniya_nachalo'])
+    ends = _to_dates(df['srok_provedeniya_okonchanie'])
+    checks['Некорректная дата начала'] = starts.isna() & (text['srok_provedeniya_nachalo'] != '')
+    checks['Некорректная дата окончания'] = ends.isna() & (text['srok_provedeniya_okonchanie'] != '')
+    checks['Окончание раньше начала'] = ends < starts
+
+    duration = (ends - starts).dt.days + 1
+    sbor_type = text['sbor_stazhirovka'].str.lower()
+    for keyword, min_days in MIN_DURATION_DAYS:
+        checks[f'{keyword.capitalize()} короче {min_days} дней'] = (
+            sbor_type.str.contains(keyword, regex=False) & (ends >= starts) & (duration < min_days)
+        )
+
+    for column, (label, max_value) in COUNT_LIMITS.items():
+        counts = _to_counts(df[column])
+        checks[f'«{label}» должно быть числом'] = counts.isna() & (text[column] != '')
+        checks[f'«{label}» должно быть ≥ 0'] = counts < 0
+        checks[f'«{label}» не может быть больше {max_value}'] = counts > max_value
+
+    phone_digits = text['mobilnyy'].str.replace(r'\D', '', regex=True)
+    checks['Некорректный мобильный телефон'] = (text['mobilnyy'] != '') & (phone_digits.str.len() < 11)
+    checks['Строка повторяет одну из предыдущих'] = _row_fingerprints(df).duplicated(keep='first')
+
+    masks = pd.DataFrame(checks, index=df.index).fillna(False).astype(bool)
+    hits = masks.loc[masks.any(axis=1)]
+    if hits.empty:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+
+    messages = pd.Series('', index=hits.index, dtype=object)
+    for message in hits.columns:
+        messages = messages + hits[message].map({True: f'{message}; ', False: ''})
+
+    return pd.DataFrame({
+        'row': hits.index + ISSUE_ROW_OFFSET,
+        'nazvanie_vuza': text['nazvanie_vuza'].loc[hits.index].to_numpy(),
+        'vus_no': text['vus_no'].loc[hits.index].to_numpy(),
+        'issues': messages.str[:-2].to_numpy(),
+        **{
+            column: df[column].loc[hits.index].to_numpy() if column in df.columns else ''
+            for column in SOURCE_COLUMNS
+        },
+    })[ISSUE_COLUMNS]
+
+
+def merge_excel_files(files, dedup: str = DEDUP_REPORT, sheet_pattern: str = '') -> Path:
     files = list(files)
     if not files:
         raise ValueError('Не переданы файлы для объединения.')
@@ -279,31 +665,34 @@ def merge_excel_files(files) -> Path:
     frames: list[pd.DataFrame] = []
 
     for file_obj in files:
-        if hasattr(file_obj, 'seek'):
-            file_obj.seek(0)
+        for df in _iter_uploaded_tables(file_obj, sheet_pattern):
+            df = _remove_empty_rows(df)
 
-        df = _read_harmonized_dataframe(file_obj)
-        df = _remove_empty_rows(df)
-
-        if not df.empty:
-            frames.append(df)
+            if not df.empty:
+                frames.append(df)
 
     if not frames:
         raise ValueError('Не удалось прочитать данные из файлов.')
 
     merged_df = pd.concat(frames, ignore_index=True)
     merged_df = _remove_empty_rows(merged_df)
+    merged_df = _drop_duplicate_rows(merged_df, dedup)
 
     output_dir = Path(settings.MEDIA_ROOT) / 'exports'
     output_dir.mkdir(parents=True, exist_ok=True)
     path = output_dir / f'merged_{uuid.uuid4().hex}.xlsx'
 
-    _export_merged_table(merged_df, path)
+    _export_merged_table(merged_df, path, validate_merged_frame(merged_df))
     return path
 
 
 def decode_for_admin(path: Path) -> Path:
-    df = _read_harmonized_dataframe(path)
+    decoded_path = path.with_name(f'{path.stem}_decoded.xlsx')
+    # The CSV sidecar is written last, so its presence marks a complete export.
+    if _is_up_to_date(_dataset_path(decoded_path), path) and decoded_path.exists():
+        return decoded_path
+
+    df = _load_dataset(path)
     officer_vus, nonoffice_vus, nonoffice_positions = _load_decoding_maps()
 
     def _decode_vus(row) -> str:
@@ -328,8 +717,7 @@ def decode_for_admin(path: Path) -> Path:
         lambda val: _lookup_decoding(val, nonoffice_positions, 3) or ''
     )
 
-    decoded_path = path.with_name(f'{path.stem}_decoded.xlsx')
-    _export_merged_table(df, decoded_path)
+    _export_merged_table(df, decoded_path, validate_merged_frame(df))
     return decoded_path
 
 
@@ -538,23 +926,86 @@ def _write_section(wb: Workbook, title: str, df: pd.DataFrame, is_sergeants: boo
     ws.column_dimensions[get_column_letter(2)].width = 50
 
 
-def create_report(path: Path) -> Path:
-    df = _read_harmonized_dataframe(path)
+def _report_filter_mask(
+    df: pd.DataFrame,
+    okrug: str = '',
+    ovu: str = '',
+    program: str = '',
+    date_from=None,
+    date_to=None,
+) -> pd.Series:
+    mask = pd.Series(True, index=df.index)
+    if okrug:
+        mask &= df['okrug_vuza'].str.strip().str.upper() == okrug.strip().upper()
+    if ovu:
+        mask &= df['ovu_otv_podgotovku'].str.strip().str.casefold() == ovu.strip().casefold()
+    if program:
+        mask &= df['programma_podgotovki'].str.strip() == program.strip()
+    if date_from:
+        mask &= df['srok_provedeniya_nachalo'] >= pd.Timestamp(date_from)
+    if date_to:
+        mask &= df['srok_provedeniya_nachalo'] <= pd.Timestamp(date_to)
+    return mask
+
+
+def create_report(
+    path: Path,
+    okrug: str = '',
+    ovu: str = '',
+    program: str = '',
+    date_from=None,
+    date_to=None,
+    sections=None,
+) -> Path:
+    """Build the plan report, optionally for a subset of rows and sections.
+
+    Filters are combined into one boolean mask over the loaded table; the
+    training start date is compared against ``date_from``/``date_to``.
+    The file name is derived from the options, so a report is rebuilt only
+    when its source table is newer than the existing file.
+    """
+    sections = list(REPORT_SECTIONS if sections is None else sections)
+    if not sections:
+        raise ValueError('Не выбран ни один раздел отчёта.')
+    unknown = [key for key in sections if key not in REPORT_SECTIONS]
+    if unknown:
+        raise ValueError(f'Неизвестные разделы отчёта: {", ".join(unknown)}.')
+
+    options = (okrug, ovu, program, date_from, date_to)
+    filtered = any(options) or len(sections) < len(REPORT_SECTIONS)
+    if filtered:
+        options_key = repr((*options, sorted(sections))).encode('utf-8')
+        suffix = f'_report_{hashlib.sha1(options_key).hexdigest()[:12]}'
+    else:
+        suffix = '_report'
+    report_path = path.with_name(f'{path.stem}{suffix}.xlsx')
+
+    if _is_up_to_date(report_path, path):
+        return report_path
+
+    df = _load_dataset(path)
     for col in ('srok_provedeniya_nachalo', 'srok_provedeniya_okonchanie'):
-        df[col] = pd.to_datetime(df[col], errors='coerce')
+        df[col] = _to_dates(df[col])
     for col in ('planiruetsya_studentov', 'planiruetsya_prepodavatelej'):
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+        df[col] = _to_counts(df[col]).fillna(0).astype(int)
 
-    cadre_df = df[df['programma_podgotovki'] == 'Офицеры кадра']
-    reserve_df = df[df['programma_podgotovki'] == 'Офицеры запаса']
-    others_df = df[~df['programma_podgotovki'].isin(['Офицеры кадра', 'Офицеры запаса'])]
+    df = df.loc[_report_filter_mask(df, okrug, ovu, program, date_from, date_to)]
+
+    programs = df['programma_podgotovki']
+    section_masks = {
+        'cadre': programs == PROGRAM_CADRE,
+        'reserve': programs == PROGRAM_RESERVE,
+        'others': ~programs.isin([PROGRAM_CADRE, PROGRAM_RESERVE]),
+    }
 
     wb = Workbook()
     wb.remove(wb.active)
-    _write_section(wb, 'I. Офицеры кадра', cadre_df, is_sergeants=False)
-    _write_section(wb, 'II. Офицеры запаса', reserve_df, is_sergeants=False)
-    _write_section(wb, 'III. Сержанты и солдаты', others_df, is_sergeants=True)
-
-    report_path = path.with_name(f'{path.stem}_report.xlsx')
-    wb.save(report_path)
+    for key, (title, is_sergeants) in REPORT_SECTIONS.items():
+        if key in sections:
+            _write_section(wb, title, df.loc[section_masks[key]], is_sergeants=is_sergeants)
+
+    # Write next to the target and swap in atomically: readers never see a partial file.
+    tmp_path = report_path.with_name(f'{report_path.stem}.{uuid.uuid4().hex}.tmp')
+    wb.save(tmp_path)
+    os.replace(tmp_path, report_path)
     return report_path
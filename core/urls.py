@@ -20,6 +20,7 @@ urlpatterns = [
     path('questionnaire/', views.questionnaire, name='questionnaire'),
     path('upload/', views.upload_files, name='upload_files'),
     path('download/merged/', views.download_merged, name='download_merged'),
+    path('download/merged/<str:export_format>/', views.export_merged, name='export_merged'),
     path('decode/', views.decode_vus, name='decode_vus'),
     path('report/', views.create_report, name='create_report'),
 ]
\ No newline at end of file
@@ -1,19 +1,33 @@
+import secrets
 from pathlib import Path
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.views.decorators.gzip import gzip_page
 
-from .forms import ExcelUploadForm
-from .services import create_report as generate_plan_report
-from .services import decode_for_admin, merge_excel_files
+from .concurrency import OperationBusy, heavy_operations
+from .constants import REPORT_SECTIONS
+from .forms import ExcelUploadForm, ReportForm
+
+# core.services pulls in pandas and openpyxl, so it is imported inside the
+# views that run the pipeline: login, dashboard and manage.py commands
+# (which load the URLconf for system checks) never pay for it.
 
 
 SESSION_KEY = 'merged_file_path'
 UPLOADED_FILES_KEY = 'uploaded_file_names'
+CLIENT_ID_KEY = 'client_id'
+# Keeps the session small enough for cookie-based session storage.
+UPLOADED_FILES_SESSION_LIMIT = 50
+
+STREAMED_EXPORTS = {
+    'csv': ('iter_merged_csv', 'text/csv; charset=utf-8'),
+    'ndjson': ('iter_merged_ndjson', 'application/x-ndjson; charset=utf-8'),
+}
 
 
 def _session_path(request) -> Path | None:
@@ -26,11 +40,28 @@ def _session_path(request) -> Path | None:
     return path
 
 
+def _client_id(request) -> tuple:
+    # Shared accounts (e.g. guest) are used from several browsers, so the
+    # heavy-operation cap is per user and session, not per user.
+    if CLIENT_ID_KEY not in request.session:
+        request.session[CLIENT_ID_KEY] = secrets.token_hex(8)
+    return request.user.pk, request.session[CLIENT_ID_KEY]
+
+
+def _busy_response(request):
+    messages.warning(
+        request,
+        'Предыдущие операции ещё выполняются. Дождитесь их завершения и повторите попытку.',
+    )
+    return redirect('dashboard')
+
+
 @login_required
 def dashboard(request):
     merged_file = _session_path(request)
     context = {
         'form': ExcelUploadForm(),
+        'report_form': ReportForm(),
         'merged_file': merged_file,
         'uploaded_file_names': request.session.get(UPLOADED_FILES_KEY, []),
     }
@@ -48,25 +79,37 @@ def upload_files(request):
         return redirect('dashboard')
 
     form = ExcelUploadForm(request.POST, request.FILES)
-    uploaded_files = request.FILES.getlist('files')
-    request.session[UPLOADED_FILES_KEY] = [file.name for file in uploaded_files]
+    uploaded_file_names = [file.name for file in request.FILES.getlist('files')]
+    session_file_names = uploaded_file_names[:UPLOADED_FILES_SESSION_LIMIT]
+    if request.session.get(UPLOADED_FILES_KEY) != session_file_names:
+        request.session[UPLOADED_FILES_KEY] = session_file_names
 
     if not form.is_valid():
-        for error in form.errors.get('files', []):
-            messages.error(request, error)
+        for field_errors in form.errors.values():
+            for error in field_errors:
+                messages.error(request, error)
         return redirect('dashboard')
 
+    from .services import merge_excel_files
+
     try:
-        merged = merge_excel_files(form.cleaned_data['files'])
+        merged = heavy_operations.run(
+            _client_id(request),
+            None,
+            lambda: merge_excel_files(
+                form.cleaned_data['files'],
+                dedup=form.cleaned_data['dedup'],
+                sheet_pattern=form.cleaned_data['sheets'],
+            ),
+        )
+    except OperationBusy:
+        return _busy_response(request)
     except Exception as exc:
         messages.error(request, f'Не удалось объединить файлы: {exc}')
         return redirect('dashboard')
 
     request.session[SESSION_KEY] = str(merged)
-    messages.success(
-        request,
-        f'Файлы успешно объединены: {", ".join(request.session.get(UPLOADED_FILES_KEY, []))}.'
-    )
+    messages.success(request, f'Файлы успешно объединены: {", ".join(uploaded_file_names)}.')
     return redirect('dashboard')
 
 
@@ -78,13 +121,45 @@ def download_merged(request):
     return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
 
 
+@login_required
+@gzip_page
+def export_merged(request, export_format):
+    path = _session_path(request)
+    if not path:
+        raise Http404('Нет подготовленного файла для скачивания.')
+
+    from . import services
+
+    if export_format == 'parquet':
+        try:
+            parquet_path = services.export_merged_parquet(path)
+        except ImportError:
+            messages.error(request, 'Экспорт в Parquet недоступен: не установлен pyarrow.')
+            return redirect('dashboard')
+        return FileResponse(parquet_path.open('rb'), as_attachment=True, filename=parquet_path.name)
+
+    if export_format not in STREAMED_EXPORTS:
+        raise Http404('Неизвестный формат выгрузки.')
+
+    iterator_name, content_type = STREAMED_EXPORTS[export_format]
+    iterator = getattr(services, iterator_name)
+    response = StreamingHttpResponse(iterator(path), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{path.stem}.{export_format}"'
+    return response
+
+
 @staff_member_required
 def decode_vus(request):
     path = _session_path(request)
     if not path:
         raise Http404('Сначала загрузите и объедините файлы.')
 
-    decoded = decode_for_admin(path)
+    from .services import decode_for_admin
+
+    try:
+        decoded = heavy_operations.run(_client_id(request), ('decode', str(path)), lambda: decode_for_admin(path))
+    except OperationBusy:
+        return _busy_response(request)
     request.session[SESSION_KEY] = str(decoded)
     messages.success(request, 'Расшифровка выполнена (доступно только администратору).')
     return redirect('dashboard')
@@ -96,5 +171,22 @@ def create_report(request):
     if not path:
         raise Http404('Сначала загрузите и объедините файлы.')
 
-    report = generate_plan_report(path)
+    # The plain «Создать отчёт» link carries no parameters: full report.
+    form = ReportForm(request.GET or {'sections': list(REPORT_SECTIONS)})
+    if not form.is_valid():
+        for field_errors in form.errors.values():
+            for error in field_errors:
+                messages.error(request, error)
+        return redirect('dashboard')
+
+    from .services import create_report as generate_plan_report
+
+    options = form.cleaned_data
+    key = ('report', str(path), *(
+        (name, tuple(value) if isinstance(value, list) else value) for name, value in sorted(options.items())
+    ))
+    try:
+        report = heavy_operations.run(_client_id(request), key, lambda: generate_plan_report(path, **options))
+    except OperationBusy:
+        return _busy_response(request)
     return FileResponse(report.open('rb'), as_attachment=True, filename=report.name)
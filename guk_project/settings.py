@@ -18,6 +18,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,10 +64,25 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'core' / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Preload pandas/openpyxl and Mapping/ dictionaries when a WSGI worker starts.
+WARM_UP_PIPELINE = False
+
+# Merge/decode/report requests one user session may have in progress,
+# including those waiting for an identical decode/report to finish; further
+# requests are refused. Lock files in MEDIA_ROOT/locks coordinate all worker
+# processes (core.concurrency).
+HEAVY_OPERATIONS_PER_USER = 2
+
+# Uncompressed size limits for workbooks inside uploaded zip archives.
+UPLOAD_ZIP_MAX_ENTRY_SIZE = 50 * 1024 * 1024
+UPLOAD_ZIP_MAX_TOTAL_SIZE = 200 * 1024 * 1024
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
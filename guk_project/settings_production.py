@@ -0,0 +1,44 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+
+def _required_env(name: str) -> str:
+    value = os.environ.get(name, '').strip()
+    if not value:
+        raise ImproperlyConfigured(f'Set the {name} environment variable for the production profile.')
+    return value
+
+
+DEBUG = False
+# Signs session and message cookies, so it must never be the public dev key.
+SECRET_KEY = _required_env('DJANGO_SECRET_KEY')
+ALLOWED_HOSTS = [host.strip() for host in _required_env('DJANGO_ALLOWED_HOSTS').split(',') if host.strip()]
+
+# Python-level wait for a lock (seconds) before "database is locked".
+DATABASES['default']['OPTIONS'] = {'timeout': 20}
+
+# Applied on every new connection by core.db.apply_sqlite_pragmas.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+}
+
+# collectstatic writes content-hashed copies plus .gz/.br variants; WhiteNoise
+# serves them with far-future Cache-Control headers.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+WARM_UP_PIPELINE = True
+
+# The session only holds the merged file path and recent upload names, so it
+# fits in a signed cookie: no session table writes and no per-worker state.
+# Flash messages live in a cookie as well.
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
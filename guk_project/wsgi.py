@@ -1,5 +1,13 @@
 import os
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'guk_project.settings')
 application = get_wsgi_application()
+
+# Only web workers import this module, so manage.py commands stay fast.
+# Under gunicorn without --preload this runs in every worker after fork.
+if settings.WARM_UP_PIPELINE:
+    from core.services import warm_up
+
+    warm_up()